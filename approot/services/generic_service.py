@@ -5,7 +5,7 @@ YAML 定義のエンティティに共通するサービス層。
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Mapping, Callable
+from typing import Any, Dict, List, Mapping, Callable
 
 from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError, DBAPIError
 
@@ -236,6 +236,16 @@ def handle_action(
     }
 
 
+def _form_fields(form_cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """フォーム定義の sections を平坦化し、name を持つフィールドだけを返す。"""
+    return [
+        field
+        for section in form_cfg.get("sections", [])
+        for field in section.get("fields", [])
+        if field.get("name")
+    ]
+
+
 def _validate_field(field: Dict[str, Any], value: Any) -> str | None:
     """
     単一フィールドをバリデートし、不正ならエラーメッセージを返す。問題なければ None。
@@ -282,17 +292,14 @@ def handle_save(
     # 入力検証
     errors = {}
     form_cfg = entity.get("form", {})
+    fields = _form_fields(form_cfg)
     
-    for section in form_cfg.get("sections", []):
-        for field in section.get("fields", []):
-            field_name = field.get("name")
-            if not field_name:
-                continue
-            
-            value = payload.get(field_name)
-            error_msg = _validate_field(field, value)
-            if error_msg:
-                errors[field_name] = error_msg
+    for field in fields:
+        field_name = field["name"]
+        value = payload.get(field_name)
+        error_msg = _validate_field(field, value)
+        if error_msg:
+            errors[field_name] = error_msg
     
     # バリデーションに失敗したらフォームコンテキストを返す
     if errors:
@@ -316,11 +323,7 @@ def handle_save(
     
     # 許可したフィールドだけを渡し、未知のカラムをリポジトリへ渡さない
     allowed_fields = {pk_name}
-    for section in form_cfg.get("sections", []):
-        for field in section.get("fields", []):
-            name = field.get("name")
-            if name:
-                allowed_fields.add(name)
+    allowed_fields.update(field["name"] for field in fields)
 
     filtered_payload = {k: v for k, v in payload.items() if k in allowed_fields}
 
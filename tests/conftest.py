@@ -1,7 +1,85 @@
+import functools
 import sys
 from pathlib import Path
 
+import pytest
+from flask import Flask
+from jinja2 import FileSystemBytecodeCache
+
 # Ensure project root is on sys.path for approot imports
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+TEMPLATE_FOLDER = ROOT / "approot" / "templates"
+
+# DB env vars the approot modules expect; identical for every test
+_ENV = {
+    "SQLALCHEMY_DATABASE_URL": "sqlite:///:memory:",
+    "DB_POOL_SIZE": "5",
+}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def stub_env():
+    """Set the DB env vars once for the whole run so approot modules import cleanly."""
+    with pytest.MonkeyPatch.context() as mp:
+        for key, value in _ENV.items():
+            mp.setenv(key, value)
+        yield
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    """Bare Flask app over approot/templates, shared by every template test in the run.
+
+    Every template is compiled once here into a bytecode cache, so apps built later
+    (e.g. the reloaded approot.app) load bytecode instead of parsing.
+    """
+    app = Flask(__name__, template_folder=str(TEMPLATE_FOLDER))
+    # Unbounded template cache: every primed template stays compiled for the whole run
+    app.jinja_options = {**app.jinja_options, "cache_size": -1}
+    # Templates do not change during a run: skip mtime checks
+    app.config['TEMPLATES_AUTO_RELOAD'] = False
+    env = app.jinja_env
+    env.auto_reload = False
+    env.bytecode_cache = FileSystemBytecodeCache(str(tmp_path_factory.mktemp("jinja_bcc")))
+    for name in env.list_templates():
+        env.get_template(name)
+    return app
+
+
+@pytest.fixture(scope="session")
+def jinja_bytecode_cache(app):
+    """Jinja bytecode cache primed by the shared app, for other Flask apps built during the run."""
+    return app.jinja_env.bytecode_cache
+
+
+@functools.lru_cache(maxsize=1)
+def _import_approot_app():
+    from approot import app as app_module
+    return app_module
+
+
+@pytest.fixture(scope="session")
+def approot_app():
+    """Getter for the approot.app module: imported on the first call, cached afterwards.
+
+    Call it inside a fixture body once the mocks are in place, since the first import
+    loads entities through entities_loader. It hands back the module rather than
+    app_module.app because importlib.reload() updates the module in place.
+    """
+    return _import_approot_app
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "slow: defensive/edge-case tests; deselect with -m 'not slow' for a fast run"
+    )
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Close the shared DB pool once at the end of the run instead of per module."""
+    db = sys.modules.get("approot.db")
+    if db is not None:
+        db.close_pool()
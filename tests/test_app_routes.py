@@ -2,30 +2,19 @@
 Task 5: Unit tests for Flask generic routes
 Tests entity-based endpoints that use generic_service and return HTMX partial templates.
 """
-import sys
+import re
 import types
 import pytest
 from flask import Flask
 
 
-@pytest.fixture(autouse=True)
-def stub_requests_and_env(monkeypatch):
-    """Stub network/databricks deps so approot modules import cleanly."""
-    # Set SQLAlchemy env vars for new db.py
-    monkeypatch.setenv("SQLALCHEMY_DATABASE_URL", "sqlite:///:memory:")
-    monkeypatch.setenv("DB_POOL_SIZE", "5")
+# Form controls in a rendered body, matched on the raw bytes without a lowercase copy
+_FORM_CTRL_RX = re.compile(rb'(?i)<(?:form|input|textarea)\b')
 
 
 @pytest.fixture
 def mock_db(monkeypatch):
     """Mock db module to avoid actual DB connections."""
-    import sys
-    from pathlib import Path
-    
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
-    
     from approot import db
     
     # Mock the connection pool functions
@@ -128,11 +117,9 @@ def mock_generic_repo(monkeypatch):
 @pytest.fixture
 def status_entity(monkeypatch):
     """Provide a status entity in _ENTITIES and restore after use."""
-    from copy import deepcopy
     from approot.app import _ENTITIES
 
-    original = deepcopy(_ENTITIES)
-    _ENTITIES['status'] = {
+    status = {
         'name': 'status',
         'table': 'statuses',
         'label': 'Status',
@@ -140,26 +127,14 @@ def status_entity(monkeypatch):
         'list': {'columns': [{'name': 'id'}, {'name': 'name'}]},
         'form': {'sections': []},
     }
-
-    try:
-        yield _ENTITIES['status']
-    finally:
-        _ENTITIES.clear()
-        _ENTITIES.update(original)
+    monkeypatch.setitem(_ENTITIES, 'status', status)
+    return status
 
 
 @pytest.fixture
-def client(mock_db, mock_entities_loader, mock_generic_repo):
+def client(mock_db, mock_entities_loader, mock_generic_repo, approot_app):
     """Create Flask test client with mocked dependencies."""
-    import sys
-    from pathlib import Path
-    
-    # Ensure project root is in sys.path so approot can be imported as a package
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
-    
-    from approot.app import app
+    app = approot_app().app
     
     app.config['TESTING'] = True
     
@@ -221,7 +196,7 @@ def test_entity_form_create_route(client):
     response = client.get('/customer/form')
     assert response.status_code == 200
     # Should contain form elements
-    assert b'form' in response.data.lower() or b'input' in response.data.lower()
+    assert _FORM_CTRL_RX.search(response.data)
 
 
 def test_entity_form_edit_route(client):
@@ -293,13 +268,6 @@ def test_entity_action_route_unknown_action(client):
 # Task 8: Comprehensive action dispatch tests
 def test_entity_action_with_registered_handler_returns_200(client, monkeypatch):
     """Task 8: POST /<entity>/actions/<action> returns 200 when handler exists and succeeds"""
-    import sys
-    from pathlib import Path
-    
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
-    
     from approot import app
     
     # Register a test handler
@@ -307,49 +275,32 @@ def test_entity_action_with_registered_handler_returns_200(client, monkeypatch):
         return {"message": "Handler executed", "data": payload}
     
     # Add action to entity definition
-    original_handlers = app._ACTION_HANDLERS.copy()
-    app._ACTION_HANDLERS['save'] = test_handler
+    monkeypatch.setitem(app._ACTION_HANDLERS, 'save', test_handler)
     
-    try:
-        response = client.post('/customer/actions/save', data={'field': 'value'})
-        
-        assert response.status_code == 200
-        assert b'Action completed successfully' in response.data or b'Handler executed' in response.data
-    finally:
-        app._ACTION_HANDLERS.clear()
-        app._ACTION_HANDLERS.update(original_handlers)
+    response = client.post('/customer/actions/save', data={'field': 'value'})
+    
+    assert response.status_code == 200
+    assert b'Action completed successfully' in response.data or b'Handler executed' in response.data
 
 
 def test_entity_action_with_registered_handler_json_payload(client, monkeypatch):
     """Task 8: POST /<entity>/actions/<action> accepts JSON payload"""
-    import sys
-    from pathlib import Path
-    
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
-    
     from approot import app
     
     # Register a test handler
     def test_handler(entity, payload):
         return {"received": payload}
     
-    original_handlers = app._ACTION_HANDLERS.copy()
-    app._ACTION_HANDLERS['save'] = test_handler
+    monkeypatch.setitem(app._ACTION_HANDLERS, 'save', test_handler)
     
-    try:
-        response = client.post(
-            '/customer/actions/save',
-            json={'field': 'value', 'number': 42},
-            content_type='application/json'
-        )
-        
-        assert response.status_code == 200
-        assert b'Action completed successfully' in response.data
-    finally:
-        app._ACTION_HANDLERS.clear()
-        app._ACTION_HANDLERS.update(original_handlers)
+    response = client.post(
+        '/customer/actions/save',
+        json={'field': 'value', 'number': 42},
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 200
+    assert b'Action completed successfully' in response.data
 
 
 def test_entity_action_missing_handler_returns_501(client):
@@ -364,73 +315,42 @@ def test_entity_action_missing_handler_returns_501(client):
 
 def test_entity_action_handler_exception_returns_500(client, monkeypatch):
     """Task 8: POST /<entity>/actions/<action> returns 500 when handler raises exception"""
-    import sys
-    from pathlib import Path
-    
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
-    
     from approot import app
     
     # Register a failing handler
     def failing_handler(entity, payload):
         raise RuntimeError("Handler error")
     
-    original_handlers = app._ACTION_HANDLERS.copy()
-    app._ACTION_HANDLERS['save'] = failing_handler
+    monkeypatch.setitem(app._ACTION_HANDLERS, 'save', failing_handler)
     
-    try:
-        response = client.post('/customer/actions/save', data={'field': 'value'})
-        
-        assert response.status_code == 500
-        assert b'error' in response.data.lower() or b'handler error' in response.data.lower()
-        assert b'<div' in response.data
-    finally:
-        app._ACTION_HANDLERS.clear()
-        app._ACTION_HANDLERS.update(original_handlers)
+    response = client.post('/customer/actions/save', data={'field': 'value'})
+    
+    assert response.status_code == 500
+    assert b'error' in response.data.lower() or b'handler error' in response.data.lower()
+    assert b'<div' in response.data
 
 
 def test_entity_action_returns_template_not_plain_text(client, monkeypatch):
     """Task 8: POST /<entity>/actions/<action> returns HTML template, not plain text"""
-    import sys
-    from pathlib import Path
-    
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
-    
     from approot import app
     
     # Register a test handler
     def test_handler(entity, payload):
         return {"status": "ok"}
     
-    original_handlers = app._ACTION_HANDLERS.copy()
-    app._ACTION_HANDLERS['save'] = test_handler
+    monkeypatch.setitem(app._ACTION_HANDLERS, 'save', test_handler)
     
-    try:
-        response = client.post('/customer/actions/save', data={})
-        
-        assert response.status_code == 200
-        # Should contain HTML alert/div structure, not plain "Action ... executed successfully"
-        assert b'<div' in response.data or b'alert' in response.data
-        assert b'Action {action_name} executed successfully' not in response.data
-    finally:
-        app._ACTION_HANDLERS.clear()
-        app._ACTION_HANDLERS.update(original_handlers)
+    response = client.post('/customer/actions/save', data={})
+    
+    assert response.status_code == 200
+    # Should contain HTML alert/div structure, not plain "Action ... executed successfully"
+    assert b'<div' in response.data or b'alert' in response.data
+    assert b'Action {action_name} executed successfully' not in response.data
 
 
 # Task 5: Test /lookup/<lookup_name> endpoint
 def test_lookup_route(client, monkeypatch, status_entity):
     """Task 5: GET /lookup/<lookup_name> returns lookup results"""
-    import sys
-    from pathlib import Path
-    
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
-    
     from approot.repositories import generic_repo
     
     def mock_search_lookup(entity, query, limit=20):
@@ -449,13 +369,6 @@ def test_lookup_route(client, monkeypatch, status_entity):
 
 def test_lookup_route_with_query(client, monkeypatch, status_entity):
     """Task 5: GET /lookup/<lookup_name> supports query parameter"""
-    import sys
-    from pathlib import Path
-    
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
-    
     from approot.repositories import generic_repo
     
     def mock_search_lookup(entity, query, limit=20):
@@ -550,13 +463,6 @@ def test_entity_action_with_empty_action_name(client):
 
 def test_lookup_route_with_very_long_query(client, monkeypatch, status_entity):
     """Task 6: Test lookup with very long query string"""
-    import sys
-    from pathlib import Path
-    
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
-    
     from approot.repositories import generic_repo
     
     def mock_search_lookup(entity, query, limit=20):
@@ -571,13 +477,6 @@ def test_lookup_route_with_very_long_query(client, monkeypatch, status_entity):
 
 def test_lookup_route_with_missing_query_param(client, monkeypatch, status_entity):
     """Task 6: Test lookup without query parameter"""
-    import sys
-    from pathlib import Path
-    
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
-    
     from approot.repositories import generic_repo
     
     def mock_search_lookup(entity, query, limit=20):
@@ -4,6 +4,7 @@ Tests verify that Flask routes work correctly with real SQLAlchemy backend.
 Uses file-based SQLite DB to persist across connections.
 """
 import pytest
+import re
 import tempfile
 import os
 import importlib
@@ -11,6 +12,10 @@ from pathlib import Path
 from sqlalchemy import create_engine, Table, Column, Integer, String, MetaData, text
 
 
+# Form controls in a rendered body, matched on the raw bytes without a lowercase copy
+_FORM_CTRL_RX = re.compile(rb'(?i)<(?:form|input|textarea)\b')
+
+
 # Set up environment before any imports
 def pytest_configure():
     """Configure pytest - runs before test collection."""
@@ -20,65 +25,56 @@ def pytest_configure():
         os.environ["DB_POOL_SIZE"] = "5"
 
 
-@pytest.fixture(scope='module')
-def temp_db_file():
-    """Create temporary file-based SQLite database for the whole module."""
-    fd, path = tempfile.mkstemp(suffix='.db')
-    os.close(fd)
-    yield path
-    # Cleanup
-    try:
-        os.unlink(path)
-    except OSError:
-        pass
+_METADATA = MetaData()
 
+# Customers table
+_CUSTOMERS = Table(
+    'customers',
+    _METADATA,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('name', String(100)),
+    Column('email', String(100)),
+    Column('age', Integer),
+    Column('status', String(50)),
+)
 
-@pytest.fixture(scope='module')
-def sqlalchemy_db_url(temp_db_file):
-    """SQLAlchemy database URL for file-based SQLite."""
-    return f"sqlite:///{temp_db_file}"
+# Statuses lookup table
+_STATUSES = Table(
+    'statuses',
+    _METADATA,
+    Column('id', String(50), primary_key=True),
+    Column('name', String(100)),
+)
 
 
 @pytest.fixture(scope='module', autouse=True)
-def setup_test_db(sqlalchemy_db_url, temp_db_file):
-    """Set up test database once for all tests in module."""
+def setup_test_db():
+    """Set up a file-based SQLite test database once for all tests in module."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # SQLite creates the file on first connect
+        sqlalchemy_db_url = f"sqlite:///{os.path.join(tmp_dir, 'test.db')}"
+        _create_test_db(sqlalchemy_db_url)
+        yield
+
+
+def _create_test_db(sqlalchemy_db_url):
+    """Point the app at the given SQLite URL and create/seed its tables."""
     # Update environment
     os.environ["SQLALCHEMY_DATABASE_URL"] = sqlalchemy_db_url
     os.environ["DB_POOL_SIZE"] = "5"
     
     # Create engine and tables
     engine = create_engine(sqlalchemy_db_url)
-    metadata = MetaData()
-    
-    # Create customers table
-    customers = Table(
-        'customers',
-        metadata,
-        Column('id', Integer, primary_key=True, autoincrement=True),
-        Column('name', String(100)),
-        Column('email', String(100)),
-        Column('age', Integer),
-        Column('status', String(50)),
-    )
-    
-    # Create statuses lookup table
-    statuses = Table(
-        'statuses',
-        metadata,
-        Column('id', String(50), primary_key=True),
-        Column('name', String(100)),
-    )
-    
-    metadata.create_all(engine)
+    _METADATA.create_all(engine)
     
     # Seed data
     with engine.connect() as conn:
-        conn.execute(customers.insert(), [
+        conn.execute(_CUSTOMERS.insert(), [
             {'id': 1, 'name': 'Alice', 'email': 'alice@example.com', 'age': 30, 'status': 'active'},
             {'id': 2, 'name': 'Bob', 'email': 'bob@example.com', 'age': 25, 'status': 'active'},
             {'id': 3, 'name': 'Charlie', 'email': 'charlie@example.com', 'age': 35, 'status': 'inactive'},
         ])
-        conn.execute(statuses.insert(), [
+        conn.execute(_STATUSES.insert(), [
             {'id': 'active', 'name': 'Active'},
             {'id': 'inactive', 'name': 'Inactive'},
             {'id': 'pending', 'name': 'Pending'},
@@ -86,12 +82,6 @@ def setup_test_db(sqlalchemy_db_url, temp_db_file):
         conn.commit()
     
     engine.dispose()
-    
-    yield
-    
-    # Module teardown - close any open connections
-    from approot import db
-    db.close_pool()
 
 
 @pytest.fixture
@@ -191,7 +181,7 @@ def test_entity_form_create_route_with_sqlalchemy(client):
     
     assert response.status_code == 200
     # Should contain form elements
-    assert b'form' in response.data.lower() or b'input' in response.data.lower()
+    assert _FORM_CTRL_RX.search(response.data)
     # Should be partial HTML
     assert b'<!DOCTYPE' not in response.data
 
@@ -408,7 +398,7 @@ def test_form_response_contains_form_elements(client):
     
     assert response.status_code == 200
     # Should contain form-related HTML
-    assert b'input' in response.data.lower() or b'form' in response.data.lower()
+    assert _FORM_CTRL_RX.search(response.data)
 
 
 def test_detail_response_is_partial_not_full_page(client):
@@ -2,18 +2,6 @@
 Test for entity load error banner display (Task 9)
 This test verifies that when entities.yaml has errors, the UI shows a banner.
 """
-import sys
-import types
-import pytest
-from pathlib import Path
-
-
-@pytest.fixture(autouse=True)
-def stub_requests_and_env(monkeypatch):
-    """Stub network/databricks deps so approot modules import cleanly."""
-    # Set SQLAlchemy env vars for new db.py
-    monkeypatch.setenv("SQLALCHEMY_DATABASE_URL", "sqlite:///:memory:")
-    monkeypatch.setenv("DB_POOL_SIZE", "5")
 
 
 def test_entity_load_error_shows_banner_in_layout(monkeypatch):
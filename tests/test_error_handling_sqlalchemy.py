@@ -8,13 +8,6 @@ from unittest.mock import patch, MagicMock
 from sqlalchemy.exc import OperationalError, TimeoutError as SQLAlchemyTimeoutError, DBAPIError
 
 
-@pytest.fixture(autouse=True)
-def stub_env(monkeypatch):
-    """Set environment variables for SQLAlchemy"""
-    monkeypatch.setenv("SQLALCHEMY_DATABASE_URL", "sqlite:///:memory:")
-    monkeypatch.setenv("DB_POOL_SIZE", "5")
-
-
 @pytest.fixture
 def sample_entity():
     """Sample entity config for testing"""
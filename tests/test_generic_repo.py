@@ -41,14 +41,6 @@ class DummyConnection:
         self.closed = True
 
 
-@pytest.fixture(autouse=True)
-def stub_db_deps(monkeypatch):
-    """Stub db.py dependencies so tests can run without real database."""
-    # Set SQLAlchemy env vars for new db.py
-    monkeypatch.setenv("SQLALCHEMY_DATABASE_URL", "sqlite:///:memory:")
-    monkeypatch.setenv("DB_POOL_SIZE", "5")
-
-
 @pytest.fixture
 def entity_cfg():
     return {
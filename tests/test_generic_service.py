@@ -6,17 +6,41 @@ import sys
 import types
 import pytest
 
+from approot.services import generic_service
 
-@pytest.fixture(autouse=True)
-def stub_requests_and_env(monkeypatch):
-    """Stub network/databricks deps so approot.db imports cleanly."""
-    # Set SQLAlchemy env vars for new db.py
-    monkeypatch.setenv("SQLALCHEMY_DATABASE_URL", "sqlite:///:memory:")
-    monkeypatch.setenv("DB_POOL_SIZE", "5")
+
+class _RepoStub:
+    """Stand-in for generic_repo.fetch_list/fetch_detail with configurable results."""
+
+    def __init__(self):
+        self.list_return = []
+        self.detail_return = None
+        self.list_raises = None
+        self.detail_raises = None
+
+    def fetch_list(self, entity, page=1, page_size=None, sort=None):
+        if self.list_raises:
+            raise self.list_raises
+        return self.list_return
+
+    def fetch_detail(self, entity, pk):
+        if self.detail_raises:
+            raise self.detail_raises
+        return self.detail_return
 
 
 @pytest.fixture
+def repo_stub(monkeypatch):
+    """Patch generic_repo reads once; tests set list_return/detail_return/*_raises."""
+    stub = _RepoStub()
+    monkeypatch.setattr(generic_service.generic_repo, "fetch_list", stub.fetch_list)
+    monkeypatch.setattr(generic_service.generic_repo, "fetch_detail", stub.fetch_detail)
+    return stub
+
+
+@pytest.fixture(scope="module")
 def entities():
+    """Read-only entity map shared by the whole module (no test mutates it)."""
     return {
         "customer": {
             "name": "customer",
@@ -52,15 +76,9 @@ def entities():
     }
 
 
-def test_render_list_success(monkeypatch, entities):
-    from approot.services import generic_service
-
+def test_render_list_success(repo_stub, entities):
     rows = [{"id": 1, "name": "Alice"}]
-    monkeypatch.setattr(
-        generic_service.generic_repo,
-        "fetch_list",
-        lambda entity, page=1, page_size=None, sort=None: rows,
-    )
+    repo_stub.list_return = rows
 
     ctx = generic_service.render_list(entities, "customer", page=2, page_size=5, sort="-name")
 
@@ -75,8 +93,6 @@ def test_render_list_success(monkeypatch, entities):
 
 
 def test_render_list_unknown_entity(entities):
-    from approot.services import generic_service
-
     ctx = generic_service.render_list(entities, "unknown")
 
     assert ctx["ok"] is False
@@ -84,10 +100,8 @@ def test_render_list_unknown_entity(entities):
     assert "unknown entity" in ctx["error"].lower()
 
 
-def test_render_detail_not_found(monkeypatch, entities):
-    from approot.services import generic_service
-
-    monkeypatch.setattr(generic_service.generic_repo, "fetch_detail", lambda entity, pk: None)
+def test_render_detail_not_found(repo_stub, entities):
+    repo_stub.detail_return = None
 
     ctx = generic_service.render_detail(entities, "customer", pk=999)
 
@@ -97,11 +111,9 @@ def test_render_detail_not_found(monkeypatch, entities):
     assert "not found" in ctx["error"].lower()
 
 
-def test_render_detail_success(monkeypatch, entities):
-    from approot.services import generic_service
-
+def test_render_detail_success(repo_stub, entities):
     record = {"id": 2, "name": "Bob"}
-    monkeypatch.setattr(generic_service.generic_repo, "fetch_detail", lambda entity, pk: record)
+    repo_stub.detail_return = record
 
     ctx = generic_service.render_detail(entities, "customer", pk=2)
 
@@ -112,8 +124,6 @@ def test_render_detail_success(monkeypatch, entities):
 
 
 def test_render_form_create(monkeypatch, entities):
-    from approot.services import generic_service
-
     ctx = generic_service.render_form(entities, "customer")
 
     assert ctx["ok"] is True
@@ -122,11 +132,9 @@ def test_render_form_create(monkeypatch, entities):
     assert ctx["form"] == entities["customer"]["form"]
 
 
-def test_render_form_edit(monkeypatch, entities):
-    from approot.services import generic_service
-
+def test_render_form_edit(repo_stub, entities):
     record = {"id": 3, "name": "Carol"}
-    monkeypatch.setattr(generic_service.generic_repo, "fetch_detail", lambda entity, pk: record)
+    repo_stub.detail_return = record
 
     ctx = generic_service.render_form(entities, "customer", pk=3)
 
@@ -135,10 +143,8 @@ def test_render_form_edit(monkeypatch, entities):
     assert ctx["record"] == record
 
 
-def test_render_form_missing_record(monkeypatch, entities):
-    from approot.services import generic_service
-
-    monkeypatch.setattr(generic_service.generic_repo, "fetch_detail", lambda entity, pk: None)
+def test_render_form_missing_record(repo_stub, entities):
+    repo_stub.detail_return = None
 
     ctx = generic_service.render_form(entities, "customer", pk=55)
 
@@ -148,8 +154,6 @@ def test_render_form_missing_record(monkeypatch, entities):
 
 
 def test_handle_action_dispatch(monkeypatch, entities):
-    from approot.services import generic_service
-
     called = {}
 
     def calc_handler(entity, payload):
@@ -172,8 +176,6 @@ def test_handle_action_dispatch(monkeypatch, entities):
 
 
 def test_handle_action_unknown(monkeypatch, entities):
-    from approot.services import generic_service
-
     ctx = generic_service.handle_action(
         entities,
         entity_name="customer",
@@ -187,8 +189,6 @@ def test_handle_action_unknown(monkeypatch, entities):
 
 
 def test_handle_action_missing_handler(monkeypatch, entities):
-    from approot.services import generic_service
-
     ctx = generic_service.handle_action(
         entities,
         entity_name="customer",
@@ -207,8 +207,6 @@ def test_handle_action_missing_handler(monkeypatch, entities):
 
 def test_handle_action_returns_error_context_with_template_fields(monkeypatch, entities):
     """Task 8: ensure error context carries ok/status/error for template rendering"""
-    from approot.services import generic_service
-
     ctx = generic_service.handle_action(
         entities,
         entity_name="customer",
@@ -223,8 +221,6 @@ def test_handle_action_returns_error_context_with_template_fields(monkeypatch, e
 
 def test_handle_action_payload_defaults_to_empty_dict(monkeypatch, entities):
     """Task 8: None payload should be converted to {} and handed to handler"""
-    from approot.services import generic_service
-
     called = {}
 
     def handler(entity, payload):
@@ -243,13 +239,8 @@ def test_handle_action_payload_defaults_to_empty_dict(monkeypatch, entities):
     assert called["payload"] == {}
 
 
-def test_render_list_handles_repo_error(monkeypatch, entities):
-    from approot.services import generic_service
-
-    def boom(*args, **kwargs):
-        raise RuntimeError("boom")
-
-    monkeypatch.setattr(generic_service.generic_repo, "fetch_list", boom)
+def test_render_list_handles_repo_error(repo_stub, entities):
+    repo_stub.list_raises = RuntimeError("boom")
 
     ctx = generic_service.render_list(entities, "customer")
 
@@ -262,11 +253,17 @@ def test_render_list_handles_repo_error(monkeypatch, entities):
 # Task 6: Edge cases and error paths
 
 
-def test_render_list_with_none_entities():
-    """Task 6: Test render_list when entities dict is None"""
-    from approot.services import generic_service
-
-    ctx = generic_service.render_list(None, "customer")
+@pytest.mark.parametrize(
+    "render_name,kwargs",
+    [
+        ("render_list", {}),
+        ("render_detail", {"pk": 1}),
+        ("render_form", {}),
+    ],
+)
+def test_render_with_none_entities(render_name, kwargs):
+    """Task 6: Test render_list/render_detail/render_form when entities dict is None"""
+    ctx = getattr(generic_service, render_name)(None, "customer", **kwargs)
 
     assert ctx["ok"] is False
     assert ctx["status"] == 404
@@ -275,42 +272,15 @@ def test_render_list_with_none_entities():
 
 def test_render_list_with_empty_entities():
     """Task 6: Test render_list with empty entities dict"""
-    from approot.services import generic_service
-
     ctx = generic_service.render_list({}, "customer")
 
     assert ctx["ok"] is False
     assert ctx["status"] == 404
 
 
-def test_render_detail_with_none_entities():
-    """Task 6: Test render_detail when entities dict is None"""
-    from approot.services import generic_service
-
-    ctx = generic_service.render_detail(None, "customer", pk=1)
-
-    assert ctx["ok"] is False
-    assert ctx["status"] == 404
-
-
-def test_render_form_with_none_entities():
-    """Task 6: Test render_form when entities dict is None"""
-    from approot.services import generic_service
-
-    ctx = generic_service.render_form(None, "customer")
-
-    assert ctx["ok"] is False
-    assert ctx["status"] == 404
-
-
-def test_render_detail_handles_repo_error(monkeypatch, entities):
+def test_render_detail_handles_repo_error(repo_stub, entities):
     """Task 6: Test render_detail when repository raises exception"""
-    from approot.services import generic_service
-
-    def boom(*args, **kwargs):
-        raise RuntimeError("database error")
-
-    monkeypatch.setattr(generic_service.generic_repo, "fetch_detail", boom)
+    repo_stub.detail_raises = RuntimeError("database error")
 
     ctx = generic_service.render_detail(entities, "customer", pk=1)
 
@@ -320,14 +290,9 @@ def test_render_detail_handles_repo_error(monkeypatch, entities):
     assert ctx["error"] == "処理に失敗しました"
 
 
-def test_render_form_edit_handles_repo_error(monkeypatch, entities):
+def test_render_form_edit_handles_repo_error(repo_stub, entities):
     """Task 6: Test render_form in edit mode when repository raises exception"""
-    from approot.services import generic_service
-
-    def boom(*args, **kwargs):
-        raise RuntimeError("fetch failed")
-
-    monkeypatch.setattr(generic_service.generic_repo, "fetch_detail", boom)
+    repo_stub.detail_raises = RuntimeError("fetch failed")
 
     ctx = generic_service.render_form(entities, "customer", pk=1)
 
@@ -339,8 +304,6 @@ def test_render_form_edit_handles_repo_error(monkeypatch, entities):
 
 def test_handle_action_with_none_entities():
     """Task 6: Test handle_action when entities dict is None"""
-    from approot.services import generic_service
-
     ctx = generic_service.handle_action(
         None,
         entity_name="customer",
@@ -354,8 +317,6 @@ def test_handle_action_with_none_entities():
 
 def test_handle_action_with_empty_payload():
     """Task 6: Test handle_action with None payload"""
-    from approot.services import generic_service
-
     entities = {
         "customer": {
             "name": "customer",
@@ -385,8 +346,6 @@ def test_handle_action_with_empty_payload():
 
 def test_handle_action_handler_raises_exception(monkeypatch, entities):
     """Task 6: Test handle_action when handler raises exception"""
-    from approot.services import generic_service
-
     def failing_handler(entity, payload):
         raise ValueError("handler failed")
 
@@ -404,10 +363,8 @@ def test_handle_action_handler_raises_exception(monkeypatch, entities):
     assert ctx["error"] == "処理に失敗しました"
 
 
-def test_render_list_with_missing_list_config(monkeypatch):
+def test_render_list_with_missing_list_config(repo_stub):
     """Task 6: Test render_list when entity has no list config"""
-    from approot.services import generic_service
-
     entities = {
         "customer": {
             "name": "customer",
@@ -417,11 +374,7 @@ def test_render_list_with_missing_list_config(monkeypatch):
         }
     }
 
-    monkeypatch.setattr(
-        generic_service.generic_repo,
-        "fetch_list",
-        lambda entity, page=1, page_size=None, sort=None: []
-    )
+    repo_stub.list_return = []
 
     ctx = generic_service.render_list(entities, "customer")
 
@@ -431,10 +384,8 @@ def test_render_list_with_missing_list_config(monkeypatch):
     assert ctx["actions"] == []
 
 
-def test_render_detail_with_missing_form_config():
+def test_render_detail_with_missing_form_config(repo_stub):
     """Task 6: Test render_detail when entity has no form config"""
-    from approot.services import generic_service
-
     entities = {
         "customer": {
             "name": "customer",
@@ -444,27 +395,17 @@ def test_render_detail_with_missing_form_config():
         }
     }
 
-    def mock_fetch_detail(entity, pk):
-        return {"id": 1, "name": "Alice"}
-
-    import approot.services.generic_service as gs
-    original_fetch = gs.generic_repo.fetch_detail
-    gs.generic_repo.fetch_detail = mock_fetch_detail
+    repo_stub.detail_return = {"id": 1, "name": "Alice"}
 
-    try:
-        ctx = generic_service.render_detail(entities, "customer", pk=1)
+    ctx = generic_service.render_detail(entities, "customer", pk=1)
 
-        assert ctx["ok"] is True
-        # Should handle missing form config gracefully
-        assert ctx["actions"] == []
-    finally:
-        gs.generic_repo.fetch_detail = original_fetch
+    assert ctx["ok"] is True
+    # Should handle missing form config gracefully
+    assert ctx["actions"] == []
 
 
 def test_render_form_create_with_missing_form_config():
     """Task 6: Test render_form create mode when entity has no form config"""
-    from approot.services import generic_service
-
     entities = {
         "customer": {
             "name": "customer",
@@ -484,8 +425,6 @@ def test_render_form_create_with_missing_form_config():
 
 def test_find_action_in_list_actions():
     """Task 6: Test that actions can be found in list.actions"""
-    from approot.services.generic_service import _find_action
-
     entity = {
         "list": {
             "actions": [
@@ -497,34 +436,26 @@ def test_find_action_in_list_actions():
         }
     }
 
-    action = _find_action(entity, "export")
+    action = generic_service._find_action(entity, "export")
     assert action is not None
     assert action["name"] == "export"
 
 
 def test_find_action_not_in_any_list():
     """Task 6: Test _find_action returns None for non-existent action"""
-    from approot.services.generic_service import _find_action
-
     entity = {
         "list": {"actions": []},
         "form": {"actions": [{"name": "save", "label": "Save"}]}
     }
 
-    action = _find_action(entity, "nonexistent")
+    action = generic_service._find_action(entity, "nonexistent")
     assert action is None
 
 
-def test_render_list_with_none_page_and_sort(monkeypatch, entities):
+def test_render_list_with_none_page_and_sort(repo_stub, entities):
     """Task 6: Test render_list with None page and sort parameters"""
-    from approot.services import generic_service
-
     rows = [{"id": 1, "name": "Alice"}]
-    monkeypatch.setattr(
-        generic_service.generic_repo,
-        "fetch_list",
-        lambda entity, page=1, page_size=None, sort=None: rows
-    )
+    repo_stub.list_return = rows
 
     ctx = generic_service.render_list(entities, "customer", page=None, sort=None)
 
@@ -535,8 +466,6 @@ def test_render_list_with_none_page_and_sort(monkeypatch, entities):
 
 def test_handle_action_with_empty_handlers_dict(entities):
     """Task 6: Test handle_action with empty handlers dict instead of None"""
-    from approot.services import generic_service
-
     ctx = generic_service.handle_action(
         entities,
         entity_name="customer",
@@ -1,164 +1,209 @@
 """
 Task 13: SQLAlchemy regression tests for generic_service.py
 Tests verify that generic_service works correctly with real SQLAlchemy backend.
-Uses file-based SQLite DB to persist across connections.
+Uses a shared-cache in-memory SQLite DB so every connection sees the same data.
 """
+import uuid
+
 import pytest
-import tempfile
-import os
 from pathlib import Path
 from sqlalchemy import create_engine, Table, Column, Integer, String, MetaData, text
+from sqlalchemy.pool import StaticPool
+
+from approot import db
+from approot.repositories import generic_repo
+from approot.services import generic_service
+
+
+# Read-only entity config shared by every test; built once at import time.
+_ENTITIES = {
+    "customer": {
+        "name": "customer",
+        "table": "customers",
+        "label": "Customer",
+        "primary_key": "id",
+        "list": {
+            "columns": [
+                {"name": "id", "label": "ID"},
+                {"name": "name", "label": "Name"},
+                {"name": "email", "label": "Email"},
+            ],
+            "default_sort": "name",
+            "page_size": 20,
+            "actions": [
+                {"name": "export_csv", "label": "Export CSV"},
+            ],
+        },
+        "form": {
+            "sections": [
+                {
+                    "label": "Basic Info",
+                    "fields": [
+                        {"name": "name", "label": "Name", "type": "text", "required": True},
+                        {"name": "email", "label": "Email", "type": "email", "required": True},
+                        {"name": "age", "label": "Age", "type": "number"},
+                        {"name": "status", "label": "Status", "type": "text"},
+                    ],
+                }
+            ],
+            "actions": [
+                {"name": "calc_points", "label": "Calc Points"},
+            ],
+        },
+    },
+    "status": {
+        "name": "status",
+        "table": "statuses",
+        "label": "Status",
+        "primary_key": "id",
+        "list": {
+            "columns": [
+                {"name": "id", "label": "ID"},
+                {"name": "name", "label": "Name"},
+            ],
+            "default_sort": "name",
+            "page_size": 20,
+        },
+        "form": {
+            "sections": [
+                {
+                    "label": "Info",
+                    "fields": [
+                        {"name": "id", "label": "ID", "type": "text"},
+                        {"name": "name", "label": "Name", "type": "text"},
+                    ],
+                }
+            ],
+        },
+    },
+}
+
+
+_METADATA = MetaData()
+
+# Customers table
+_CUSTOMERS = Table(
+    'customers',
+    _METADATA,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('name', String(100)),
+    Column('email', String(100)),
+    Column('age', Integer),
+    Column('status', String(50)),
+)
+
+# Statuses lookup table
+_STATUSES = Table(
+    'statuses',
+    _METADATA,
+    Column('id', String(50), primary_key=True),
+    Column('name', String(100)),
+)
+
+_CUSTOMER_ROWS = [
+    (1, 'Alice', 'alice@example.com', 30, 'active'),
+    (2, 'Bob', 'bob@example.com', 25, 'active'),
+    (3, 'Charlie', 'charlie@example.com', 35, 'inactive'),
+]
+
+_STATUS_ROWS = [
+    ('active', 'Active'),
+    ('inactive', 'Inactive'),
+    ('pending', 'Pending'),
+]
+
+
+def _seed(conn):
+    """Bulk-insert seed rows straight through the DBAPI executemany."""
+    conn.exec_driver_sql(
+        "INSERT INTO customers (id, name, email, age, status) VALUES (?, ?, ?, ?, ?)",
+        _CUSTOMER_ROWS,
+    )
+    conn.exec_driver_sql("INSERT INTO statuses (id, name) VALUES (?, ?)", _STATUS_ROWS)
+
+
+@pytest.fixture(scope="module")
+def setup_sqlalchemy_db(entities):
+    """Initialize db module with in-memory SQLite and create test schema once per module.
+
+    db.init_pool() only knows how to build Databricks URLs, so the SQLite engine is
+    created here and installed on approot.db directly (generic_repo only reads
+    db._engine via get_engine()/get_connection()).
+    """
+    # Shared-cache in-memory SQLite URL, unique per module run
+    sqlalchemy_db_url = f"sqlite:///file:test_db_{uuid.uuid4().hex}?mode=memory&cache=shared&uri=true"
+    # StaticPool: one connection for everything, so the in-memory DB lives as long as the engine
+    # and teardown is a single dispose(); the connection may be reused from other threads.
+    # No rollback on checkin, otherwise any checkout (e.g. table reflection) would discard
+    # the SAVEPOINT a writable_db test is running in.
+    engine = create_engine(
+        sqlalchemy_db_url,
+        poolclass=StaticPool,
+        pool_reset_on_return=None,
+        connect_args={"check_same_thread": False},
+    )
+    
+    # Schema + seed data in one checkout/transaction; the DB is brand new, so skip existence probes
+    with engine.begin() as conn:
+        _METADATA.create_all(bind=conn, checkfirst=False)
+        _seed(conn)
+    
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(db, '_engine', engine)
+        mp.setattr(db, '_initialized', True)
+        mp.setattr(db, '_uses_client_credentials', False)
+        # Warm generic_repo's reflected-Table cache once so no test pays first-reflection cost
+        generic_repo.preload_tables(entities)
+        yield db
+    
+    # Teardown
+    engine.dispose()
 
 
-@pytest.fixture
-def temp_db_file():
-    """Create temporary file-based SQLite database."""
-    fd, path = tempfile.mkstemp(suffix='.db')
-    os.close(fd)
-    yield path
-    # Cleanup
-    try:
-        os.unlink(path)
-    except OSError:
+class _SavepointConnection:
+    """DBAPI connection proxy whose commit/rollback/close leave the test SAVEPOINT open."""
+
+    def __init__(self, inner):
+        self._inner = inner
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def commit(self):
         pass
 
+    def rollback(self):
+        pass
 
-@pytest.fixture
-def sqlalchemy_db_url(temp_db_file):
-    """SQLAlchemy database URL for file-based SQLite."""
-    return f"sqlite:///{temp_db_file}"
+    def close(self):
+        pass
 
 
 @pytest.fixture
-def setup_sqlalchemy_db(monkeypatch, sqlalchemy_db_url, temp_db_file):
-    """Initialize db module with file-based SQLite and create test schema."""
-    # Set environment variables for db module
-    monkeypatch.setenv("SQLALCHEMY_DATABASE_URL", sqlalchemy_db_url)
-    monkeypatch.setenv("DB_POOL_SIZE", "5")
-    
-    # Import db module and reset state
-    from approot import db
-    db.close_pool()
-    
-    # Initialize pool
-    db.init_pool()
-    
-    # Create test tables and seed data
-    engine = db.get_engine()
-    metadata = MetaData()
-    
-    # Create customers table
-    customers = Table(
-        'customers',
-        metadata,
-        Column('id', Integer, primary_key=True, autoincrement=True),
-        Column('name', String(100)),
-        Column('email', String(100)),
-        Column('age', Integer),
-        Column('status', String(50)),
-    )
-    
-    # Create statuses lookup table
-    statuses = Table(
-        'statuses',
-        metadata,
-        Column('id', String(50), primary_key=True),
-        Column('name', String(100)),
-    )
-    
-    metadata.create_all(engine)
-    
-    # Seed data
-    with engine.connect() as conn:
-        conn.execute(customers.insert(), [
-            {'id': 1, 'name': 'Alice', 'email': 'alice@example.com', 'age': 30, 'status': 'active'},
-            {'id': 2, 'name': 'Bob', 'email': 'bob@example.com', 'age': 25, 'status': 'active'},
-            {'id': 3, 'name': 'Charlie', 'email': 'charlie@example.com', 'age': 35, 'status': 'inactive'},
-        ])
-        conn.execute(statuses.insert(), [
-            {'id': 'active', 'name': 'Active'},
-            {'id': 'inactive', 'name': 'Inactive'},
-            {'id': 'pending', 'name': 'Pending'},
-        ])
-        conn.commit()
-    
-    yield db
-    
-    # Teardown
-    db.close_pool()
+def writable_db(setup_sqlalchemy_db, monkeypatch):
+    """Module DB for tests that write; their changes run inside a SAVEPOINT rolled back afterwards."""
+    raw = setup_sqlalchemy_db.get_engine().raw_connection()
+    cursor = raw.cursor()
+    cursor.execute("SAVEPOINT writable_db")
+    monkeypatch.setattr(setup_sqlalchemy_db, 'get_connection', lambda timeout=None: _SavepointConnection(raw))
+    try:
+        yield setup_sqlalchemy_db
+    finally:
+        cursor.execute("ROLLBACK TO writable_db")
+        cursor.execute("RELEASE writable_db")
+        cursor.close()
+        raw.close()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def entities():
     """Entity configurations for testing."""
-    return {
-        "customer": {
-            "name": "customer",
-            "table": "customers",
-            "label": "Customer",
-            "primary_key": "id",
-            "list": {
-                "columns": [
-                    {"name": "id", "label": "ID"},
-                    {"name": "name", "label": "Name"},
-                    {"name": "email", "label": "Email"},
-                ],
-                "default_sort": "name",
-                "page_size": 20,
-                "actions": [
-                    {"name": "export_csv", "label": "Export CSV"},
-                ],
-            },
-            "form": {
-                "sections": [
-                    {
-                        "label": "Basic Info",
-                        "fields": [
-                            {"name": "name", "label": "Name", "type": "text", "required": True},
-                            {"name": "email", "label": "Email", "type": "email", "required": True},
-                            {"name": "age", "label": "Age", "type": "number"},
-                            {"name": "status", "label": "Status", "type": "text"},
-                        ],
-                    }
-                ],
-                "actions": [
-                    {"name": "calc_points", "label": "Calc Points"},
-                ],
-            },
-        },
-        "status": {
-            "name": "status",
-            "table": "statuses",
-            "label": "Status",
-            "primary_key": "id",
-            "list": {
-                "columns": [
-                    {"name": "id", "label": "ID"},
-                    {"name": "name", "label": "Name"},
-                ],
-                "default_sort": "name",
-                "page_size": 20,
-            },
-            "form": {
-                "sections": [
-                    {
-                        "label": "Info",
-                        "fields": [
-                            {"name": "id", "label": "ID", "type": "text"},
-                            {"name": "name", "label": "Name", "type": "text"},
-                        ],
-                    }
-                ],
-            },
-        },
-    }
+    return _ENTITIES
 
 
 # Test render_list with SQLAlchemy backend
 def test_render_list_with_sqlalchemy_returns_records(setup_sqlalchemy_db, entities):
     """Task 13: render_list returns records from SQLAlchemy DB."""
-    from approot.services import generic_service
-    
     ctx = generic_service.render_list(entities, "customer", page=1, page_size=10)
     
     assert ctx["ok"] is True
@@ -168,40 +213,27 @@ def test_render_list_with_sqlalchemy_returns_records(setup_sqlalchemy_db, entiti
     assert ctx["rows"][0]["name"] == "Alice"  # Sorted by name
 
 
-def test_render_list_with_pagination_sqlalchemy(setup_sqlalchemy_db, entities):
-    """Task 13: render_list pagination works with SQLAlchemy."""
-    from approot.services import generic_service
-    
-    # Page 1
-    ctx1 = generic_service.render_list(entities, "customer", page=1, page_size=2)
-    assert ctx1["ok"] is True
-    assert len(ctx1["rows"]) == 2
-    
-    # Page 2
-    ctx2 = generic_service.render_list(entities, "customer", page=2, page_size=2)
-    assert ctx2["ok"] is True
-    assert len(ctx2["rows"]) == 1
-
-
-def test_render_list_with_sorting_sqlalchemy(setup_sqlalchemy_db, entities):
-    """Task 13: render_list sorting works with SQLAlchemy."""
-    from approot.services import generic_service
+@pytest.mark.parametrize(
+    "kwargs,expected_first,expected_count",
+    [
+        ({"sort": "name"}, "Alice", 3),
+        ({"sort": "-name"}, "Charlie", 3),
+        ({"page": 1, "page_size": 2}, "Alice", 2),
+        ({"page": 2, "page_size": 2}, "Charlie", 1),
+    ],
+    ids=["sort_asc", "sort_desc", "page1", "page2"],
+)
+def test_render_list_sorting_and_pagination_sqlalchemy(setup_sqlalchemy_db, entities, kwargs, expected_first, expected_count):
+    """Task 13: render_list sorting and pagination work with SQLAlchemy."""
+    ctx = generic_service.render_list(entities, "customer", **kwargs)
     
-    # Ascending
-    ctx_asc = generic_service.render_list(entities, "customer", sort="name")
-    assert ctx_asc["ok"] is True
-    assert ctx_asc["rows"][0]["name"] == "Alice"
-    
-    # Descending
-    ctx_desc = generic_service.render_list(entities, "customer", sort="-name")
-    assert ctx_desc["ok"] is True
-    assert ctx_desc["rows"][0]["name"] == "Charlie"
+    assert ctx["ok"] is True
+    assert len(ctx["rows"]) == expected_count
+    assert ctx["rows"][0]["name"] == expected_first
 
 
-def test_render_list_unknown_entity_returns_404(setup_sqlalchemy_db, entities):
+def test_render_list_unknown_entity_returns_404(entities):
     """Task 13: render_list returns 404 for unknown entity."""
-    from approot.services import generic_service
-    
     ctx = generic_service.render_list(entities, "unknown", page=1)
     
     assert ctx["ok"] is False
@@ -212,8 +244,6 @@ def test_render_list_unknown_entity_returns_404(setup_sqlalchemy_db, entities):
 # Test render_detail with SQLAlchemy backend
 def test_render_detail_with_sqlalchemy_returns_record(setup_sqlalchemy_db, entities):
     """Task 13: render_detail returns single record from SQLAlchemy DB."""
-    from approot.services import generic_service
-    
     ctx = generic_service.render_detail(entities, "customer", pk=2)
     
     assert ctx["ok"] is True
@@ -226,8 +256,6 @@ def test_render_detail_with_sqlalchemy_returns_record(setup_sqlalchemy_db, entit
 
 def test_render_detail_not_found_sqlalchemy(setup_sqlalchemy_db, entities):
     """Task 13: render_detail returns 404 for nonexistent record."""
-    from approot.services import generic_service
-    
     ctx = generic_service.render_detail(entities, "customer", pk=999)
     
     assert ctx["ok"] is False
@@ -236,10 +264,8 @@ def test_render_detail_not_found_sqlalchemy(setup_sqlalchemy_db, entities):
 
 
 # Test render_form with SQLAlchemy backend
-def test_render_form_create_mode_sqlalchemy(setup_sqlalchemy_db, entities):
+def test_render_form_create_mode_sqlalchemy(entities):
     """Task 13: render_form in create mode works with SQLAlchemy."""
-    from approot.services import generic_service
-    
     ctx = generic_service.render_form(entities, "customer", pk=None)
     
     assert ctx["ok"] is True
@@ -250,8 +276,6 @@ def test_render_form_create_mode_sqlalchemy(setup_sqlalchemy_db, entities):
 
 def test_render_form_edit_mode_sqlalchemy(setup_sqlalchemy_db, entities):
     """Task 13: render_form in edit mode fetches record from SQLAlchemy DB."""
-    from approot.services import generic_service
-    
     ctx = generic_service.render_form(entities, "customer", pk=1)
     
     assert ctx["ok"] is True
@@ -263,8 +287,6 @@ def test_render_form_edit_mode_sqlalchemy(setup_sqlalchemy_db, entities):
 
 def test_render_form_edit_not_found_sqlalchemy(setup_sqlalchemy_db, entities):
     """Task 13: render_form returns 404 for nonexistent record in edit mode."""
-    from approot.services import generic_service
-    
     ctx = generic_service.render_form(entities, "customer", pk=999)
     
     assert ctx["ok"] is False
@@ -272,10 +294,8 @@ def test_render_form_edit_not_found_sqlalchemy(setup_sqlalchemy_db, entities):
 
 
 # Test handle_save with SQLAlchemy backend
-def test_handle_save_insert_with_sqlalchemy(setup_sqlalchemy_db, entities):
+def test_handle_save_insert_with_sqlalchemy(writable_db, entities):
     """Task 13: handle_save inserts new record into SQLAlchemy DB."""
-    from approot.services import generic_service
-    
     payload = {
         "name": "David",
         "email": "david@example.com",
@@ -292,10 +312,8 @@ def test_handle_save_insert_with_sqlalchemy(setup_sqlalchemy_db, entities):
     assert "id" in ctx["record"]
 
 
-def test_handle_save_update_with_sqlalchemy(setup_sqlalchemy_db, entities):
+def test_handle_save_update_with_sqlalchemy(writable_db, entities):
     """Task 13: handle_save updates existing record in SQLAlchemy DB."""
-    from approot.services import generic_service
-    
     payload = {
         "id": 1,
         "name": "Alice Updated",
@@ -317,8 +335,6 @@ def test_handle_save_update_with_sqlalchemy(setup_sqlalchemy_db, entities):
 
 def test_handle_save_validation_error_returns_400(setup_sqlalchemy_db, entities):
     """Task 13: handle_save returns 400 with errors for validation failures."""
-    from approot.services import generic_service
-    
     payload = {
         "name": "",  # Required field empty
         "email": "invalid",  # Invalid email
@@ -334,8 +350,6 @@ def test_handle_save_validation_error_returns_400(setup_sqlalchemy_db, entities)
 
 def test_handle_save_nonexistent_record_returns_404(setup_sqlalchemy_db, entities):
     """Task 13: handle_save returns 404 when updating nonexistent record."""
-    from approot.services import generic_service
-    
     payload = {
         "id": 999,
         "name": "Nonexistent",
@@ -351,8 +365,6 @@ def test_handle_save_nonexistent_record_returns_404(setup_sqlalchemy_db, entitie
 # Test handle_action with SQLAlchemy backend
 def test_handle_action_with_sqlalchemy_entity(setup_sqlalchemy_db, entities):
     """Task 13: handle_action works with real entity from SQLAlchemy setup."""
-    from approot.services import generic_service
-    
     def test_handler(entity, payload):
         return {"message": "Success", "data": payload}
     
@@ -369,10 +381,8 @@ def test_handle_action_with_sqlalchemy_entity(setup_sqlalchemy_db, entities):
     assert ctx["result"]["message"] == "Success"
 
 
-def test_handle_action_unknown_action_returns_404(setup_sqlalchemy_db, entities):
+def test_handle_action_unknown_action_returns_404(entities):
     """Task 13: handle_action returns 404 for unknown action."""
-    from approot.services import generic_service
-    
     ctx = generic_service.handle_action(
         entities,
         "customer",
@@ -384,10 +394,8 @@ def test_handle_action_unknown_action_returns_404(setup_sqlalchemy_db, entities)
     assert ctx["status"] == 404
 
 
-def test_handle_action_missing_handler_returns_501(setup_sqlalchemy_db, entities):
+def test_handle_action_missing_handler_returns_501(entities):
     """Task 13: handle_action returns 501 when handler not registered."""
-    from approot.services import generic_service
-    
     ctx = generic_service.handle_action(
         entities,
         "customer",
@@ -403,27 +411,15 @@ def test_handle_action_missing_handler_returns_501(setup_sqlalchemy_db, entities
 # Test lookup with SQLAlchemy backend
 def test_lookup_search_with_sqlalchemy(setup_sqlalchemy_db, entities):
     """Task 13: search_lookup returns rows from SQLAlchemy DB."""
-    from approot.repositories import generic_repo
-    
     results = generic_repo.search_lookup(entities["status"], q="Pend", limit=10)
     
     assert len(results) == 1
     assert results[0]["name"] == "Pending"
 
 
-def test_lookup_search_multiple_results(setup_sqlalchemy_db, entities):
-    """Task 13: search_lookup returns multiple matching rows."""
-    from approot.repositories import generic_repo
-    
-    results = generic_repo.search_lookup(entities["status"], q="", limit=10)
-    
-    assert len(results) == 3  # All statuses
-
-
-def test_lookup_search_respects_limit(setup_sqlalchemy_db, entities):
-    """Task 13: search_lookup respects limit parameter."""
-    from approot.repositories import generic_repo
-    
-    results = generic_repo.search_lookup(entities["status"], q="", limit=2)
+@pytest.mark.parametrize("limit,expected_count", [(10, 3), (2, 2)], ids=["all", "limited"])
+def test_lookup_search_empty_query_respects_limit(setup_sqlalchemy_db, entities, limit, expected_count):
+    """Task 13: search_lookup with an empty query returns all statuses up to the limit."""
+    results = generic_repo.search_lookup(entities["status"], q="", limit=limit)
     
-    assert len(results) <= 2
+    assert len(results) == expected_count
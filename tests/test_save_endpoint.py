@@ -2,143 +2,159 @@
 Task 7: Unit tests for POST /<entity>/save endpoint (TDD)
 Tests save pipeline: validation, insert, update, error handling.
 """
-import sys
+import importlib
+import re
 import types
+from urllib.parse import urlencode
+
 import pytest
 from flask import Flask
 
-
-@pytest.fixture(autouse=True)
-def stub_requests_and_env(monkeypatch):
-    """Stub network/databricks deps so approot modules import cleanly."""
-    # Set SQLAlchemy env vars for new db.py
-    monkeypatch.setenv("SQLALCHEMY_DATABASE_URL", "sqlite:///:memory:")
-    monkeypatch.setenv("DB_POOL_SIZE", "5")
-
-
-@pytest.fixture
-def save_test_mock_db(monkeypatch):
+from approot import db
+from approot.repositories import generic_repo
+from approot.services import entities_loader
+
+
+# Entity definitions served by the mocked entities_loader; read-only for the app
+_TEST_ENTITIES = {
+    "customer": {
+        "name": "customer",
+        "table": "customers",
+        "label": "Customer",
+        "primary_key": "id",
+        "list": {
+            "columns": [
+                {"name": "id", "label": "ID", "width": 100, "sortable": True},
+                {"name": "name", "label": "Name", "width": 200, "sortable": True},
+                {"name": "email", "label": "Email", "width": 300, "sortable": True},
+            ],
+            "default_sort": "name",
+            "page_size": 20,
+            "actions": [],
+        },
+        "form": {
+            "sections": [
+                {
+                    "label": "Basic Info",
+                    "fields": [
+                        {"name": "name", "label": "Name", "type": "text", "required": True},
+                        {"name": "email", "label": "Email", "type": "email", "required": True},
+                    ],
+                }
+            ],
+            "actions": [
+                {"name": "save", "label": "Save"},
+            ],
+        },
+    },
+}
+
+# Form bodies reused across tests, urlencoded once instead of on every client.post
+_FORM_CONTENT_TYPE = 'application/x-www-form-urlencoded'
+_PAYLOAD_CHARLIE = urlencode({'name': 'Charlie', 'email': 'charlie@example.com'}).encode()
+_PAYLOAD_ALICE_UPDATE = urlencode({
+    'id': '1',
+    'name': 'Alice Updated',
+    'email': 'alice.updated@example.com',
+}).encode()
+_PAYLOAD_MISSING_EMAIL = urlencode({'name': 'Invalid'}).encode()
+_PAYLOAD_INVALID_EMAIL = urlencode({'name': 'Test User', 'email': 'not-an-email'}).encode()
+_PAYLOAD_EMPTY = b''
+
+# Tokens checked on validation-error bodies, collected in a single case-insensitive scan
+_VALIDATION_RX = re.compile(rb'(?i)\b(form|name|email|required|error)\b')
+
+
+@pytest.fixture(scope="module")
+def save_test_mock_db():
     """Mock db module to avoid actual DB connections."""
-    import sys
-    from pathlib import Path
-    
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
-    
-    from approot import db
-    
-    monkeypatch.setattr(db, 'init_pool', lambda: None)
-    monkeypatch.setattr(db, 'close_pool', lambda: None)
-    
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(db, 'init_pool', lambda: None)
+        mp.setattr(db, 'close_pool', lambda: None)
+        yield
 
 
-@pytest.fixture
-def save_test_mock_entities_loader(monkeypatch):
+@pytest.fixture(scope="module")
+def save_test_mock_entities_loader():
     """Mock entities_loader to return test entity definitions with required fields."""
-    from approot.services import entities_loader
-    
-    test_entities = {
-        "customer": {
-            "name": "customer",
-            "table": "customers",
-            "label": "Customer",
-            "primary_key": "id",
-            "list": {
-                "columns": [
-                    {"name": "id", "label": "ID", "width": 100, "sortable": True},
-                    {"name": "name", "label": "Name", "width": 200, "sortable": True},
-                    {"name": "email", "label": "Email", "width": 300, "sortable": True},
-                ],
-                "default_sort": "name",
-                "page_size": 20,
-                "actions": [],
-            },
-            "form": {
-                "sections": [
-                    {
-                        "label": "Basic Info",
-                        "fields": [
-                            {"name": "name", "label": "Name", "type": "text", "required": True},
-                            {"name": "email", "label": "Email", "type": "email", "required": True},
-                        ],
-                    }
-                ],
-                "actions": [
-                    {"name": "save", "label": "Save"},
-                ],
-            },
-        },
-    }
-    
     def mock_load_entities(path):
-        return entities_loader.ValidationResult(success=True, entities=test_entities)
+        return entities_loader.ValidationResult(success=True, entities=_TEST_ENTITIES)
     
-    monkeypatch.setattr(entities_loader, 'load_entities', mock_load_entities)
-    return test_entities
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(entities_loader, 'load_entities', mock_load_entities)
+        yield _TEST_ENTITIES
 
 
-@pytest.fixture
-def save_test_mock_generic_repo(monkeypatch):
-    """Mock generic_repo with save functionality."""
-    from approot.repositories import generic_repo
+@pytest.fixture(scope="module")
+def save_test_mock_generic_repo():
+    """Mock generic_repo with save functionality, sharing one in-memory store per module.
+
+    Yields reset_store() for tests that need the store back in its seeded state.
+    """
+    # In-memory store for testing; a namespace so the mocks mutate it without nonlocal
+    state = types.SimpleNamespace()
+    
+    def reset_store():
+        state.store = {
+            1: {"id": 1, "name": "Alice", "email": "alice@example.com"},
+            2: {"id": 2, "name": "Bob", "email": "bob@example.com"},
+        }
+        state.next_id = 3
     
-    # In-memory store for testing
-    _store = {
-        1: {"id": 1, "name": "Alice", "email": "alice@example.com"},
-        2: {"id": 2, "name": "Bob", "email": "bob@example.com"},
-    }
-    _next_id = 3
+    reset_store()
     
     def mock_fetch_list(entity, page=1, page_size=None, sort=None):
-        return list(_store.values())
+        return list(state.store.values())
     
     def mock_fetch_detail(entity, pk):
-        return _store.get(pk)
+        return state.store.get(pk)
     
     def mock_save(entity, payload):
         """Mock save that returns saved record with id."""
-        nonlocal _next_id
         pk_name = entity.get("primary_key", "id")
         
         if pk_name in payload and payload[pk_name]:
             # Update existing
             pk = payload[pk_name]
-            if pk not in _store:
+            if pk not in state.store:
                 raise ValueError(f"Record with {pk_name}={pk} not found")
-            _store[pk] = payload
+            state.store[pk] = payload
             return payload
         else:
             # Insert new
-            new_id = _next_id
-            _next_id += 1
+            new_id = state.next_id
+            state.next_id += 1
             payload[pk_name] = new_id
-            _store[new_id] = payload
+            state.store[new_id] = payload
             return payload
     
-    monkeypatch.setattr(generic_repo, 'fetch_list', mock_fetch_list)
-    monkeypatch.setattr(generic_repo, 'fetch_detail', mock_fetch_detail)
-    monkeypatch.setattr(generic_repo, 'save', mock_save)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(generic_repo, 'fetch_list', mock_fetch_list)
+        mp.setattr(generic_repo, 'fetch_detail', mock_fetch_detail)
+        mp.setattr(generic_repo, 'save', mock_save)
+        yield reset_store
 
 
-@pytest.fixture
-def client(save_test_mock_db, save_test_mock_entities_loader, save_test_mock_generic_repo):
-    """Create Flask test client with mocked dependencies."""
-    import sys
-    import importlib
-    from pathlib import Path
-    
-    # Ensure project root is in sys.path so approot can be imported as a package
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
+@pytest.fixture(scope="module")
+def client(save_test_mock_db, save_test_mock_entities_loader, save_test_mock_generic_repo, jinja_bytecode_cache, approot_app):
+    """Create one Flask test client with mocked dependencies, shared by the module.
+
+    Tests that need a different generic_repo.save patch it with the function-scoped
+    monkeypatch; pytest restores the module-level mock afterwards.
+    """
+    # Imported lazily: loading approot.app at collection time would read the real
+    # entities.yaml, and other modules expect its first import to see mocked entities
+    app_module = approot_app()
     
     # Reload app module to pick up mocked entities_loader
-    from approot import app as app_module
     importlib.reload(app_module)
     app = app_module.app
     
     app.config['TESTING'] = True
+    app.config['TEMPLATES_AUTO_RELOAD'] = False
+    # Reloaded app gets a fresh Jinja env; reuse the session's compiled templates
+    app.jinja_env.auto_reload = False
+    app.jinja_env.bytecode_cache = jinja_bytecode_cache
     
     with app.test_client() as client:
         yield client
@@ -147,10 +163,7 @@ def client(save_test_mock_db, save_test_mock_entities_loader, save_test_mock_gen
 # Task 7: Test save success (insert)
 def test_save_insert_success_returns_detail_200(client):
     """Task 7: POST /<entity>/save for new record returns detail partial with 200"""
-    response = client.post('/customer/save', data={
-        'name': 'Charlie',
-        'email': 'charlie@example.com',
-    })
+    response = client.post('/customer/save', data=_PAYLOAD_CHARLIE, content_type=_FORM_CONTENT_TYPE)
     
     assert response.status_code == 200
     # Should contain the saved data
@@ -161,11 +174,7 @@ def test_save_insert_success_returns_detail_200(client):
 # Task 7: Test save success (update)
 def test_save_update_success_returns_detail_200(client):
     """Task 7: POST /<entity>/save for existing record returns detail partial with 200"""
-    response = client.post('/customer/save', data={
-        'id': '1',
-        'name': 'Alice Updated',
-        'email': 'alice.updated@example.com',
-    })
+    response = client.post('/customer/save', data=_PAYLOAD_ALICE_UPDATE, content_type=_FORM_CONTENT_TYPE)
     
     assert response.status_code == 200
     # Should contain the updated data
@@ -173,33 +182,22 @@ def test_save_update_success_returns_detail_200(client):
     assert b'alice.updated@example.com' in response.data
 
 
-# Task 7: Test validation error
-def test_save_validation_error_returns_form_400(client):
-    """Task 7: POST /<entity>/save with validation errors returns form partial with 400"""
-    # Missing required field 'email'
-    response = client.post('/customer/save', data={
-        'name': 'Invalid',
-    })
-    
-    assert response.status_code == 400
-    # Should return form with error message
-    assert b'form' in response.data.lower() or b'error' in response.data.lower()
-    # Should indicate email is required
-    assert b'email' in response.data.lower()
-
-
-# Task 7: Test validation error for invalid email
-def test_save_invalid_email_returns_form_400(client):
-    """Task 7: POST /<entity>/save with invalid email returns form partial with 400"""
-    response = client.post('/customer/save', data={
-        'name': 'Test User',
-        'email': 'not-an-email',
-    })
+# Task 7: Test validation errors (missing field, invalid email, empty payload)
+@pytest.mark.parametrize("payload, expected", [
+    pytest.param(_PAYLOAD_MISSING_EMAIL, {b'form', b'email'}, id="missing_email"),
+    pytest.param(_PAYLOAD_INVALID_EMAIL, {b'form', b'email'}, id="invalid_email"),
+    pytest.param(_PAYLOAD_EMPTY, {b'name', b'email', b'required'}, id="empty_payload"),
+])
+def test_save_validation_errors_return_form_400(client, payload, expected):
+    """Task 7: Validation errors return an HTMX form partial with 400 and per-field messages"""
+    response = client.post('/customer/save', data=payload, content_type=_FORM_CONTENT_TYPE)
     
     assert response.status_code == 400
-    # Should return form with email error
-    assert b'form' in response.data.lower() or b'error' in response.data.lower()
-    assert b'email' in response.data.lower()
+    # Should be a partial (not full page)
+    assert b'<!DOCTYPE' not in response.data
+    assert b'<html>' not in response.data
+    tokens = {token.lower() for token in _VALIDATION_RX.findall(response.data)}
+    assert expected <= tokens
 
 
 # Task 7: Test unknown entity
@@ -230,15 +228,6 @@ def test_save_update_nonexistent_record_returns_404(client):
 # Task 7: Test server error (simulated)
 def test_save_server_error_returns_500(client, monkeypatch):
     """Task 7: POST /<entity>/save with server error returns 500"""
-    import sys
-    from pathlib import Path
-    
-    root_path = str(Path(__file__).resolve().parents[1])
-    if root_path not in sys.path:
-        sys.path.insert(0, root_path)
-    
-    from approot.repositories import generic_repo
-    
     def mock_save_with_error(entity, payload):
         raise RuntimeError("Database connection failed")
     
@@ -254,20 +243,6 @@ def test_save_server_error_returns_500(client, monkeypatch):
     assert b'error' in response.data.lower() or b'failed' in response.data.lower()
 
 
-# Task 7: Test field errors are displayed in form
-def test_save_validation_error_shows_field_errors(client):
-    """Task 7: Validation errors show per-field error messages in form"""
-    # Missing both required fields
-    response = client.post('/customer/save', data={})
-    
-    assert response.status_code == 400
-    # Should show errors for both fields
-    data_lower = response.data.lower()
-    assert b'name' in data_lower
-    assert b'email' in data_lower
-    assert b'required' in data_lower or b'error' in data_lower
-
-
 # Task 7: Test HTMX-friendly response for success
 def test_save_success_returns_htmx_partial(client):
     """Task 7: Save success returns HTMX-compatible partial template"""
@@ -283,30 +258,8 @@ def test_save_success_returns_htmx_partial(client):
     assert b'<html>' not in response.data
 
 
-# Task 7: Test HTMX-friendly response for validation error
-def test_save_validation_error_returns_htmx_partial(client):
-    """Task 7: Validation error returns HTMX-compatible form partial"""
-    response = client.post('/customer/save', data={
-        'name': 'No Email',
-    })
-    
-    assert response.status_code == 400
-    # Should be a partial (not full page)
-    assert b'<!DOCTYPE' not in response.data
-    assert b'<html>' not in response.data
-    # Should contain form elements
-    assert b'form' in response.data.lower() or b'input' in response.data.lower()
-
-
-# Task 7: Edge case - empty payload
-def test_save_empty_payload_returns_400(client):
-    """Task 7: Save with empty payload returns validation error"""
-    response = client.post('/customer/save', data={})
-    
-    assert response.status_code == 400
-
-
 # Task 7: Edge case - extra fields
+@pytest.mark.slow
 def test_save_with_extra_fields_ignores_them(client):
     """Task 7: Save with extra fields ignores unknown fields"""
     response = client.post('/customer/save', data={
@@ -322,6 +275,7 @@ def test_save_with_extra_fields_ignores_them(client):
 
 
 # Task 7: Test special characters in data
+@pytest.mark.slow
 def test_save_with_special_characters(client):
     """Task 7: Save handles special characters correctly"""
     response = client.post('/customer/save', data={
@@ -334,6 +288,7 @@ def test_save_with_special_characters(client):
 
 
 # Task 7: Test SQL injection attempt
+@pytest.mark.slow
 def test_save_prevents_sql_injection(client):
     """Task 7: Save prevents SQL injection in field values"""
     response = client.post('/customer/save', data={